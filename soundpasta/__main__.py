@@ -4,16 +4,14 @@ import click
 
 from soundpasta.device.cli import device
 
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
-)
-
 
 @click.group()
 def cli() -> None:
     """Soundpasta - Transmit clipboard data over audio."""
-    pass
+    logging.basicConfig(
+        level=logging.DEBUG,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
 
 
 cli.add_command(device)
@@ -17,6 +17,14 @@ class DeviceManager(abc.ABC):
         """List all input devices."""
         ...
 
+    def get_output(self, name: str) -> OutputDevice | None:
+        """Get an output device by name, or None if it doesn't exist."""
+        return next((d for d in self.list_outputs() if d.name == name), None)
+
+    def get_input(self, name: str) -> InputDevice | None:
+        """Get an input device by name, or None if it doesn't exist."""
+        return next((d for d in self.list_inputs() if d.name == name), None)
+
     @abc.abstractmethod
     def list_pipes(self) -> list[VirtualPipe]:
         """List all virtual pipes."""
@@ -47,3 +55,21 @@ class DeviceManager(abc.ABC):
     def record(self, device: InputDevice, audio_data: typing.IO[bytes], duration: float, raw: bool) -> None:
         """Record audio from the specified input device to the IO stream for the given duration."""
         ...
+
+    @abc.abstractmethod
+    def play_by_name(self, name: str, audio_data: typing.IO[bytes], raw: bool) -> None:
+        """Play audio from the IO stream to the output device with the given name.
+
+        Unlike play(), this doesn't require resolving the device first. Raw audio is
+        assumed to be s16le, 2 channels, 44100 Hz.
+        """
+        ...
+
+    @abc.abstractmethod
+    def record_by_name(self, name: str, audio_data: typing.IO[bytes], duration: float, raw: bool) -> None:
+        """Record audio from the input device with the given name to the IO stream for the given duration.
+
+        Unlike record(), this doesn't require resolving the device first. Raw audio is
+        recorded as s16le, 2 channels, 44100 Hz.
+        """
+        ...
@@ -1,27 +1,43 @@
+import contextlib
 import io
+import operator
 import os
-import subprocess
-import tempfile
 import typing
 
 import click
-from tabulate import tabulate
 
 from soundpasta.device.base import DeviceManager
 from soundpasta.device.models import PipeType
-from soundpasta.device.pulseaudio import PulseAudioDeviceManager
+
+_HEADERS = ["Name", "Description", "Index", "Format", "Channels", "Sample Rate", "Mute", "Volume", "Virtual"]
+_ROW = operator.attrgetter(
+    "name", "description", "index", "sample_format", "channels", "sample_rate", "mute", "volume", "virtual"
+)
+
+
+class _LazyMgr:
+    """Proxy that builds the real device manager on first attribute access."""
+
+    def __init__(self) -> None:
+        self._mgr: DeviceManager | None = None
+
+    def __getattr__(self, name: str) -> typing.Any:
+        if self._mgr is None:
+            from soundpasta.device.pulseaudio import PulseAudioDeviceManager
+
+            self._mgr = PulseAudioDeviceManager()
+        return getattr(self._mgr, name)
 
 
 @click.group()
 @click.pass_context
 def device(ctx: click.Context) -> None:
     """Device management commands."""
-    ctx.obj = PulseAudioDeviceManager()
+    ctx.obj = _LazyMgr()
 
 
 @device.group()
-@click.pass_obj
-def input(obj: DeviceManager) -> None:
+def input() -> None:
     """Input device commands."""
     pass
 
@@ -36,22 +52,12 @@ def input_list(obj: DeviceManager, quiet: bool) -> None:
         for device in devices:
             click.echo(device.name)
     else:
-        headers = ["Name", "Description", "Index", "Format", "Channels", "Sample Rate", "Mute", "Volume", "Virtual"]
-        rows = [
-            [
-                device.name,
-                device.description,
-                device.index if device.index is not None else "",
-                device.sample_format,
-                device.channels,
-                device.sample_rate,
-                device.mute,
-                device.volume,
-                device.virtual,
-            ]
-            for device in devices
-        ]
-        click.echo(tabulate(rows, headers=headers, tablefmt="plain"))
+        from tabulate import tabulate
+
+        rows = [list(_ROW(d)) for d in devices]
+        for r in rows:
+            r[2] = "" if r[2] is None else r[2]
+        click.echo(tabulate(rows, headers=_HEADERS, tablefmt="plain"))
 
 
 @input.command("create")
@@ -66,8 +72,7 @@ def input_create(obj: DeviceManager, name: str, persistent: bool) -> None:
 
 @input.command("remove")
 @click.argument("name")
-@click.pass_obj
-def input_remove(obj: DeviceManager, name: str) -> None:
+def input_remove(name: str) -> None:
     """Remove a virtual input device."""
     click.echo(f"Removing input device '{name}'", err=True)
     # TODO: Implement when DeviceManager has remove_input method
@@ -81,23 +86,32 @@ def input_remove(obj: DeviceManager, name: str) -> None:
 @click.pass_obj
 def input_record(obj: DeviceManager, device_name: str, output_file: str, duration: float, raw: bool) -> None:
     """Record audio from the specified input device to a file."""
-    devices = obj.list_inputs()
-    device = next((d for d in devices if d.name == device_name), None)
-    if not device:
-        click.echo(f"Input device '{device_name}' not found", err=True)
-        raise click.Abort()
-
-    recorded_data = io.BytesIO()
-    obj.record(device, recorded_data, duration, raw=raw)
-    recorded_data.seek(0)
-    with open(output_file, "wb") as f:
-        f.write(recorded_data.read())
+    device = None
+    if raw:
+        # Raw PCM has no header to describe it, so record it in the device's own sample spec
+        device = obj.get_input(device_name)
+        if device is None:
+            click.echo(f"Input device '{device_name}' not found", err=True)
+            raise click.Abort()
+    # Only a failed recording's own new file is cleaned up, never a FIFO, device node or pre-existing file
+    created = not os.path.lexists(output_file)
+    try:
+        with open(output_file, "wb") as f:
+            if device is not None:
+                obj.record(device, f, duration, raw=True)
+            else:
+                obj.record_by_name(device_name, f, duration, raw=False)
+    except (RuntimeError, OSError) as e:
+        if created and os.path.isfile(output_file):
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(output_file)
+        click.echo(f"Failed to record from input device '{device_name}': {e}", err=True)
+        raise click.Abort() from e
     click.echo(f"Recorded audio from device '{device_name}' to '{output_file}'", err=True)
 
 
 @device.group()
-@click.pass_obj
-def output(obj: DeviceManager) -> None:
+def output() -> None:
     """Output device commands."""
     pass
 
@@ -112,22 +126,12 @@ def output_list(obj: DeviceManager, quiet: bool) -> None:
         for device in devices:
             click.echo(device.name)
     else:
-        headers = ["Name", "Description", "Index", "Format", "Channels", "Sample Rate", "Mute", "Volume", "Virtual"]
-        rows = [
-            [
-                device.name,
-                device.description,
-                device.index if device.index is not None else "",
-                device.sample_format,
-                device.channels,
-                device.sample_rate,
-                device.mute,
-                device.volume,
-                device.virtual,
-            ]
-            for device in devices
-        ]
-        click.echo(tabulate(rows, headers=headers, tablefmt="plain"))
+        from tabulate import tabulate
+
+        rows = [list(_ROW(d)) for d in devices]
+        for r in rows:
+            r[2] = "" if r[2] is None else r[2]
+        click.echo(tabulate(rows, headers=_HEADERS, tablefmt="plain"))
 
 
 @output.command("create")
@@ -142,8 +146,7 @@ def output_create(obj: DeviceManager, name: str, persistent: bool) -> None:
 
 @output.command("remove")
 @click.argument("name")
-@click.pass_obj
-def output_remove(obj: DeviceManager, name: str) -> None:
+def output_remove(name: str) -> None:
     """Remove a virtual output device."""
     click.echo(f"Removing output device '{name}'", err=True)
     # TODO: Implement when DeviceManager has remove_output method
@@ -156,12 +159,21 @@ def output_remove(obj: DeviceManager, name: str) -> None:
 @click.pass_obj
 def output_play(obj: DeviceManager, device_name: str, audio_file: typing.IO[bytes], raw: bool) -> None:
     """Play audio file to the specified output device."""
-    devices = obj.list_outputs()
-    device = next((d for d in devices if d.name == device_name), None)
-    if not device:
-        click.echo(f"Output device '{device_name}' not found", err=True)
-        raise click.Abort()
-    obj.play(device, audio_file, raw=raw)
+    device = None
+    if raw:
+        # Raw PCM has no header to describe it, so play it in the device's own sample spec
+        device = obj.get_output(device_name)
+        if device is None:
+            click.echo(f"Output device '{device_name}' not found", err=True)
+            raise click.Abort()
+    try:
+        if device is not None:
+            obj.play(device, audio_file, raw=True)
+        else:
+            obj.play_by_name(device_name, audio_file, raw=False)
+    except RuntimeError as e:
+        click.echo(f"Failed to play to output device '{device_name}': {e}", err=True)
+        raise click.Abort() from e
     click.echo(f"Played audio to device '{device_name}'", err=True)
 
 
@@ -180,12 +192,6 @@ def output_play_sine(obj: DeviceManager, device_name: str, duration: float, freq
       frequency: Hz (e.g., 1000)
       volume: linear gain (0.0-1.0 typical)
     """
-    devices = obj.list_outputs()
-    device = next((d for d in devices if d.name == device_name), None)
-    if not device:
-        click.echo(f"Output device '{device_name}' not found", err=True)
-        raise click.Abort()
-
     if duration <= 0:
         click.echo("Duration must be > 0", err=True)
         raise click.Abort()
@@ -196,39 +202,27 @@ def output_play_sine(obj: DeviceManager, device_name: str, duration: float, freq
         click.echo("Volume must be > 0", err=True)
         raise click.Abort()
 
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
-        wav_path = tmp_file.name
+    import numpy
+
+    n = int(duration * 44100)
+    # Wrap the phase to whole cycles in float64 first, so precision doesn't degrade with duration,
+    # then do the sin and scaling in float32 in place for numpy's wider SIMD kernels
+    cycles = numpy.arange(n, dtype=numpy.float64)
+    cycles *= frequency / 44100
+    cycles %= 1.0
+    samples = cycles.astype(numpy.float32)
+    samples *= numpy.float32(2 * numpy.pi)
+    numpy.sin(samples, out=samples)
+    samples *= numpy.float32(volume * 32767)
+    numpy.clip(samples, -32768, 32767, out=samples)
+    numpy.rint(samples, out=samples)
+    pcm = numpy.repeat(samples.astype("<i2"), 2)
     try:
-        # Generate a stereo 16-bit sine wave with sox
-        sox_cmd = [
-            "sox",
-            "-n",
-            "-r",
-            "44100",
-            "-c",
-            "2",
-            "-b",
-            "16",
-            wav_path,
-            "synth",
-            str(duration),
-            "sine",
-            str(frequency),
-            "vol",
-            str(volume),
-        ]
-        subprocess.run(sox_cmd, check=True, capture_output=True, text=True)
-        with open(wav_path, "rb") as f:
-            audio_bytes = io.BytesIO(f.read())
-        audio_bytes.seek(0)
-        obj.play(device, audio_bytes, raw=False)
-        click.echo(
-            f"Played sine wave: {frequency} Hz for {duration}s at volume {volume} to '{device_name}'",
-            err=True,
-        )
-    finally:
-        if os.path.exists(wav_path):
-            try:
-                os.unlink(wav_path)
-            except Exception:
-                pass
+        obj.play_by_name(device_name, io.BytesIO(pcm.tobytes()), raw=True)
+    except RuntimeError as e:
+        click.echo(f"Failed to play to output device '{device_name}': {e}", err=True)
+        raise click.Abort() from e
+    click.echo(
+        f"Played sine wave: {frequency} Hz for {duration}s at volume {volume} to '{device_name}'",
+        err=True,
+    )
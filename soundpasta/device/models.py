@@ -2,7 +2,7 @@ import dataclasses
 import enum
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True, frozen=True)
 class OutputDevice:
     """Dataclass for output devices (mirrors PulseAudio sinks)."""
 
@@ -36,8 +36,11 @@ class OutputDevice:
     properties: dict[str, str]
     """Generic properties dictionary."""
 
+    owner_module: int | None = None
+    """Index of the module that created the device, if known (mirrors PulseAudio's "Owner Module")."""
 
-@dataclasses.dataclass
+
+@dataclasses.dataclass(slots=True, frozen=True)
 class InputDevice:
     """Dataclass for input devices (mirrors PulseAudio sources)."""
 
@@ -71,6 +74,9 @@ class InputDevice:
     properties: dict[str, str]
     """Generic properties dictionary."""
 
+    owner_module: int | None = None
+    """Index of the module that created the device, if known (mirrors PulseAudio's "Owner Module")."""
+
 
 class PipeType(str, enum.Enum):
     """Type of virtual pipe."""
@@ -82,7 +88,7 @@ class PipeType(str, enum.Enum):
     """Output pipe (acts as speaker)."""
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True, frozen=True)
 class VirtualPipe:
     """Dataclass for virtual pipes (null sink with monitor source and remapped source)."""
 
@@ -1,6 +1,15 @@
+import dataclasses
+import io
 import logging
+import os
+import re
+import shutil
+import struct
 import subprocess
+import threading
+import time
 import typing
+import wave
 from pathlib import Path
 
 from soundpasta.device.base import DeviceManager
@@ -8,115 +17,207 @@ from soundpasta.device.models import InputDevice, OutputDevice, PipeType, Virtua
 
 logger = logging.getLogger(__name__)
 
+# Matches the lines of `pactl list sinks|sources` we care about: section headers,
+# top-level "\tField: value" lines and "\t\tkey = value" property lines.
+_PACTL_RE = re.compile(
+    r"^(?:(?P<header>(?:Sink|Source) #(?P<index>\d+))"
+    r"|\t(?P<field>[^\t:\n][^:\n]*):[ \t]*(?P<value>.*)"
+    r"|\t\t(?P<key>[^=\n]+?)[ \t]*=[ \t]*(?P<prop>.*?))[ \t]*$",
+    re.MULTILINE,
+)
+# One line of `pactl list short modules`: index, module name and (optional) arguments
+_MODULE_RE = re.compile(r"^(?P<id>\d+)\t(?P<name>\S+)\t?(?P<args>.*)$", re.MULTILINE)
+# The "# Soundpasta pipe: <name> (<type>)" header written above each pipe in soundpasta.pa
+_CONFIG_PIPE_RE = re.compile(r"^# Soundpasta pipe: (?P<name>.+) \((?:input|output)\)[ \t]*$", re.MULTILINE)
+# The "Default Sample Specification" line of `pactl info`
+_DEFAULT_SAMPLE_SPEC_RE = re.compile(r"^Default Sample Specification:[ \t]*(?P<spec>.*?)[ \t]*$", re.MULTILINE)
+_SAMPLE_SPEC_RE = re.compile(r"(?P<format>\S+)(?: +(?P<channels>\d+)ch)?(?: +(?P<rate>\d+)Hz)?")
+
+T = typing.TypeVar("T")
+
+
+def _set_description(details: dict[str, typing.Any], value: str) -> None:
+    details["description"] = value
+
+
+def _set_virtual_if_null(details: dict[str, typing.Any], value: str) -> None:
+    if value != "n/a" and "null" in value.lower():
+        details["virtual"] = True
+
+
+def _set_owner_module(details: dict[str, typing.Any], value: str) -> None:
+    if value.isdigit():
+        details["owner_module"] = int(value)
+    _set_virtual_if_null(details, value)
+
+
+def _set_sample_spec(details: dict[str, typing.Any], value: str) -> None:
+    spec = _SAMPLE_SPEC_RE.match(value)
+    if spec:
+        details["sample_format"] = spec["format"]
+        if spec["channels"]:
+            details["channels"] = int(spec["channels"])
+        if spec["rate"]:
+            details["sample_rate"] = int(spec["rate"])
+
+
+def _set_mute(details: dict[str, typing.Any], value: str) -> None:
+    details["mute"] = value.lower() == "yes"
+
+
+def _set_volume(details: dict[str, typing.Any], value: str) -> None:
+    details["volume"] = value
+
+
+# Handlers for the simple "\tField: value" lines of a pactl device section
+_FIELD_HANDLERS: dict[str, typing.Callable[[dict[str, typing.Any], str], None]] = {
+    "Description": _set_description,
+    "Driver": _set_virtual_if_null,
+    "Owner Module": _set_owner_module,
+    "Sample Specification": _set_sample_spec,
+    "Mute": _set_mute,
+    "Volume": _set_volume,
+}
+
+RAW_SAMPLE_FORMAT = "s16le"
+RAW_CHANNELS = 2
+RAW_SAMPLE_RATE = 44100
+
+
+def _token_re(token: str) -> re.Pattern[str]:
+    """Match token as a whole whitespace-separated word, so "sink_name=foo" doesn't also match "sink_name=foo-pipe"."""
+    return re.compile(rf"(?:^|\s){re.escape(token)}(?:\s|$)")
+
+
+def _copy_device[D: (OutputDevice, InputDevice)](device: D) -> D:
+    """Copy of a cached device with its own properties dict, so callers can't alter what the cache holds."""
+    return dataclasses.replace(device, properties=dict(device.properties))
+
+
+def _copy_pipe(pipe: VirtualPipe) -> VirtualPipe:
+    """Copy of a cached pipe whose devices have their own properties dicts."""
+    return dataclasses.replace(
+        pipe, sink=_copy_device(pipe.sink), monitor=_copy_device(pipe.monitor), source=_copy_device(pipe.source)
+    )
+
+
+def _streaming_wav_header(channels: int, sample_width: int, sample_rate: int) -> bytes:
+    """PCM WAV header declaring the maximum data size, for streams whose length isn't known up front.
+
+    Readers stop at the end of the stream, as they do for WAV written to stdout by sox or ffmpeg.
+    """
+    block_align = channels * sample_width
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF",
+        0xFFFFFFFF,
+        b"WAVE",
+        b"fmt ",
+        16,
+        1,
+        channels,
+        sample_rate,
+        sample_rate * block_align,
+        block_align,
+        sample_width * 8,
+        b"data",
+        0xFFFFFFFF - 36,
+    )
+
 
 class PulseAudioDeviceManager(DeviceManager):
     """PulseAudio implementation of DeviceManager using pactl/pacmd subprocess calls."""
 
-    def __init__(self, pipe_suffix: str = "-Pipe") -> None:
+    def __init__(self, pipe_suffix: str = "-Pipe", cache_ttl: float = 2.0) -> None:
         """Initialize PulseAudioDeviceManager.
 
         Args:
             pipe_suffix: Suffix to append to pipe descriptions. Defaults to "-Pipe".
                         Note: PulseAudio property values cannot contain spaces when
                         passed via command line, so use formats like "-Pipe" instead of " (Pipe)".
+            cache_ttl: Seconds for which device and pipe listings are reused before
+                       querying pactl again. Defaults to 2.0; use 0 to disable caching.
         """
         self.pipe_suffix = pipe_suffix
         # Specific role suffixes for clarity in descriptions
         self._input_suffix = "-InputPipe"
         self._output_suffix = "-OutputPipe"
         self._monitor_suffix = "-MonitorPipe"
+        # Trailing '-pipe', then the configured pipe suffix, then one role suffix, each optional and in that order
+        roles = "|".join(re.escape(s) for s in (self._input_suffix, self._output_suffix, self._monitor_suffix))
+        generic = f"(?:{re.escape(pipe_suffix)})?" if pipe_suffix else ""
+        self._role_suffix_re = re.compile(f"(?:-pipe)?{generic}(?:{roles})?$")
         self._pulse_config_dir = Path.home() / ".config" / "pulse"
         self._soundpasta_config_file = self._pulse_config_dir / "soundpasta.pa"
         self._default_config_file = self._pulse_config_dir / "default.pa"
+        self._cache: dict[str, tuple[float, typing.Any]] = {}
+        self._cache_ttl = cache_ttl
 
     def list_outputs(self) -> list[OutputDevice]:
         """List all output devices."""
+        return [_copy_device(d) for d in self._cached("outputs", self._list_outputs)]
+
+    def list_inputs(self) -> list[InputDevice]:
+        """List all input devices."""
+        return [_copy_device(d) for d in self._cached("inputs", self._list_inputs)]
+
+    def list_pipes(self) -> list[VirtualPipe]:
+        """List all virtual pipes by finding monitors that link sinks and sources together."""
+        return [_copy_pipe(p) for p in self._cached("pipes", self._list_pipes)]
+
+    def get_output(self, name: str) -> OutputDevice | None:
+        """Get an output device by name, or None if it doesn't exist."""
+        device = self._cached("outputs_by_name", lambda: {d.name: d for d in self.list_outputs()}).get(name)
+        return None if device is None else _copy_device(device)
+
+    def get_input(self, name: str) -> InputDevice | None:
+        """Get an input device by name, or None if it doesn't exist."""
+        device = self._cached("inputs_by_name", lambda: {d.name: d for d in self.list_inputs()}).get(name)
+        return None if device is None else _copy_device(device)
+
+    def invalidate(self) -> None:
+        """Drop cached listings so the next call re-queries PulseAudio."""
+        self._cache.clear()
+
+    def _cached(self, key: str, fn: typing.Callable[[], T]) -> T:
+        """Return fn()'s value cached under key, recomputing it once it's older than the cache TTL."""
+        now = time.monotonic()
+        entry = self._cache.get(key)
+        if entry is not None and now - entry[0] < self._cache_ttl:
+            return typing.cast(T, entry[1])
+        value = fn()
+        self._cache[key] = (now, value)
+        return value
+
+    def _list_outputs(self) -> list[OutputDevice]:
+        """Query pactl for all output devices."""
         logger.debug("Listing output devices")
-        result = subprocess.run(
-            ["pactl", "list", "sinks", "short"],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        sink_lines = [l for l in result.stdout.strip().split("\n") if l.strip()]
-        logger.debug(f"Found {len(sink_lines)} sink lines")
-        sinks = []
-        for line in result.stdout.strip().split("\n"):
-            if not line.strip():
-                continue
-            parts = line.split("\t")
-            if len(parts) < 4:
-                logger.debug(f"Skipping malformed sink line: {line}")
-                continue
-            index = int(parts[0]) if parts[0].isdigit() else None
-            name = parts[1]
-            logger.debug(f"Processing sink: {name} (index: {index})")
-            details = self._get_sink_details(name)
-            sinks.append(
-                OutputDevice(
-                    name=name,
-                    description=details.get("description", name),
-                    index=index,
-                    sample_format=details.get("sample_format", "s16le"),
-                    channels=details.get("channels", 2),
-                    sample_rate=details.get("sample_rate", 48000),
-                    mute=details.get("mute", False),
-                    volume=details.get("volume", ""),
-                    virtual=details.get("virtual", False),
-                    properties=details.get("properties", {}),
-                )
-            )
+        sinks = [OutputDevice(name=name, **details) for name, details in self._enumerate("sinks").items()]
         logger.info(f"Listed {len(sinks)} output devices")
         return sinks
 
-    def list_inputs(self) -> list[InputDevice]:
-        """List all input devices."""
+    def _list_inputs(self) -> list[InputDevice]:
+        """Query pactl for all input devices."""
         logger.debug("Listing input devices")
-        result = subprocess.run(
-            ["pactl", "list", "sources", "short"],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        source_lines = [l for l in result.stdout.strip().split("\n") if l.strip()]
-        logger.debug(f"Found {len(source_lines)} source lines")
-        sources = []
-        for line in result.stdout.strip().split("\n"):
-            if not line.strip():
-                continue
-            parts = line.split("\t")
-            if len(parts) < 4:
-                logger.debug(f"Skipping malformed source line: {line}")
-                continue
-            index = int(parts[0]) if parts[0].isdigit() else None
-            name = parts[1]
-            logger.debug(f"Processing source: {name} (index: {index})")
-            details = self._get_source_details(name)
-            sources.append(
-                InputDevice(
-                    name=name,
-                    description=details.get("description", name),
-                    index=index,
-                    sample_format=details.get("sample_format", "s16le"),
-                    channels=details.get("channels", 2),
-                    sample_rate=details.get("sample_rate", 48000),
-                    mute=details.get("mute", False),
-                    volume=details.get("volume", ""),
-                    virtual=details.get("virtual", False),
-                    properties=details.get("properties", {}),
-                )
-            )
+        sources = [InputDevice(name=name, **details) for name, details in self._enumerate("sources").items()]
         logger.info(f"Listed {len(sources)} input devices")
         return sources
 
-    def list_pipes(self) -> list[VirtualPipe]:
-        """List all virtual pipes by finding monitors that link sinks and sources together."""
+    def _enumerate(self, kind: typing.Literal["sinks", "sources"]) -> dict[str, dict[str, typing.Any]]:
+        """Run `pactl list <kind>` once and parse every device in it, keyed by name."""
+        devices = self._parse_all_device_details(self._pactl_list(kind))
+        logger.debug(f"Found {len(devices)} {kind}: {', '.join(devices)}")
+        return devices
+
+    def _list_pipes(self) -> list[VirtualPipe]:
+        """Build the virtual pipes from the current sinks and sources."""
         logger.debug("Listing virtual pipes")
         sinks = self.list_outputs()
         sources = self.list_inputs()
         pipes = []
         sinks_by_name = {s.name: s for s in sinks}
         sources_by_name = {s.name: s for s in sources}
+        in_config = self._load_config_pipe_names()
 
         for source in sources:
             monitor_name = source.name
@@ -145,13 +246,18 @@ class PulseAudioDeviceManager(DeviceManager):
                 remapped_source = sources_by_name.get(remapped_source_name)
 
             if sink and monitor and remapped_source and pipe_name:
-                is_persistent = self._is_pipe_in_config(pipe_name, pipe_type)
+                is_persistent = pipe_name in in_config
                 # Append role suffixes for clarity (normalize to avoid "-pipe" in descriptions)
-                sink.description = self._normalize_role_description(sink.description, self._output_suffix)
-                remapped_source.description = self._normalize_role_description(
-                    remapped_source.description, self._input_suffix
+                sink = dataclasses.replace(
+                    sink, description=self._normalize_role_description(sink.description, self._output_suffix)
+                )
+                remapped_source = dataclasses.replace(
+                    remapped_source,
+                    description=self._normalize_role_description(remapped_source.description, self._input_suffix),
+                )
+                monitor = dataclasses.replace(
+                    monitor, description=self._normalize_role_description(monitor.description, self._monitor_suffix)
                 )
-                monitor.description = self._normalize_role_description(monitor.description, self._monitor_suffix)
                 pipes.append(
                     VirtualPipe(
                         name=pipe_name,
@@ -202,26 +308,30 @@ class PulseAudioDeviceManager(DeviceManager):
         logger.debug(f"Running command: {' '.join(remap_cmd)}")
         remap_result = subprocess.run(remap_cmd, capture_output=True, text=True, check=True)
         logger.debug(f"Created remap source module: {remap_result.stdout.strip()}")
-        sinks = self.list_outputs()
-        sources = self.list_inputs()
-        sink = next((s for s in sinks if s.name == sink_name), None)
-        if not sink:
-            raise RuntimeError(f"Failed to find created sink '{sink_name}'")
-        monitor = next((s for s in sources if s.name == monitor_name), None)
-        if not monitor:
-            raise RuntimeError(f"Failed to find monitor source '{monitor_name}'")
-        source = next((s for s in sources if s.name == source_name), None)
-        if not source:
-            raise RuntimeError(f"Failed to find remapped source '{source_name}'")
+        null_sink_module = int(result.stdout)
+        remap_source_module = int(remap_result.stdout)
+        self.invalidate()
+        # Both modules loaded, so the devices exist with the names and descriptions we gave them; build them from
+        # that instead of re-enumerating every sink and source (pactl can't set the monitor's description)
+        sink = OutputDevice(
+            name=sink_name,
+            **self._created_device_details(sink_name, sink_description, sink_description, null_sink_module),
+        )
+        monitor = InputDevice(
+            name=monitor_name,
+            **self._created_device_details(
+                monitor_name, f"{name}{self._monitor_suffix}", f"Monitor of {sink_description}", null_sink_module
+            ),
+        )
+        source = InputDevice(
+            name=source_name,
+            **self._created_device_details(source_name, source_description, source_description, remap_source_module),
+        )
         logger.info(f"Created virtual pipe '{name}' with sink, monitor, and source")
         if persistent:
             self._write_pipe_to_config(
                 name, pipe_type, sink_name, source_name, monitor_name, sink_description, source_description
             )
-        # Ensure returned device descriptions carry role-specific suffixes (monitor cannot be set via pactl)
-        sink.description = self._normalize_role_description(sink.description, self._output_suffix)
-        monitor.description = self._normalize_role_description(monitor.description, self._monitor_suffix)
-        source.description = self._normalize_role_description(source.description, self._input_suffix)
         return VirtualPipe(
             name=name,
             type=pipe_type,
@@ -234,8 +344,7 @@ class PulseAudioDeviceManager(DeviceManager):
     def remove_pipe(self, name: str) -> None:
         """Remove a virtual pipe."""
         logger.info(f"Removing virtual pipe '{name}'")
-        pipes = self.list_pipes()
-        pipe = next((p for p in pipes if p.name == name), None)
+        pipe = {p.name: p for p in self.list_pipes()}.get(name)
         if not pipe:
             logger.warning(f"Pipe '{name}' not found")
             return
@@ -247,25 +356,53 @@ class PulseAudioDeviceManager(DeviceManager):
         else:
             sink_name = name
             source_name = f"{name}-pipe"
+        try:
+            unloaded = False
+            # The listing already names the modules that own the pipe's devices, so no module scan is needed
+            if pipe.sink.owner_module is not None and pipe.source.owner_module is not None:
+                try:
+                    self._unload_pipe_modules(str(pipe.sink.owner_module), str(pipe.source.owner_module))
+                    unloaded = True
+                except subprocess.CalledProcessError:
+                    logger.debug(f"Modules listed for pipe '{name}' are gone, scanning loaded modules")
+            if not unloaded:
+                self._unload_pipe_modules(*self._find_pipe_modules(sink_name, source_name))
+        finally:
+            # Even a partial unload changes the devices, so never keep serving the old listings
+            self.invalidate()
+        logger.info(f"Removed virtual pipe '{name}'")
+
+    def _pactl_list(self, *args: str) -> str:
+        """Run `pactl list <args>` and return its output.
+
+        pactl translates the long listings ("Sink #", "Name:", ...), so it runs in the C
+        locale to keep them parseable on any desktop. stdout is read as bytes and decoded
+        once; stderr isn't captured, so pactl's own error messages still reach the terminal.
+        """
         result = subprocess.run(
-            ["pactl", "list", "short", "modules"],
-            capture_output=True,
-            text=True,
+            ["pactl", "list", *args],
+            stdout=subprocess.PIPE,
+            env={**os.environ, "LC_ALL": "C"},
             check=True,
         )
+        return result.stdout.decode("utf-8", "replace")
+
+    def _find_pipe_modules(self, sink_name: str, source_name: str) -> tuple[str | None, str | None]:
+        """Scan the loaded modules for a pipe's (null sink, remap source) module IDs."""
+        output = self._pactl_list("short", "modules")
+        sink_arg = _token_re(f"sink_name={sink_name}")
+        source_arg = _token_re(f"source_name={source_name}")
         null_sink_module = None
         remap_source_module = None
-        for line in result.stdout.strip().split("\n"):
-            if not line.strip():
-                continue
-            parts = line.split("\t")
-            if len(parts) < 2:
-                continue
-            module_args = " ".join(parts[2:]) if len(parts) > 2 else ""
-            if parts[1].startswith("module-null-sink") and f"sink_name={sink_name}" in module_args:
-                null_sink_module = parts[0]
-            elif parts[1].startswith("module-remap-source") and f"source_name={source_name}" in module_args:
-                remap_source_module = parts[0]
+        for m in _MODULE_RE.finditer(output):
+            if m["name"] == "module-null-sink" and sink_arg.search(m["args"]):
+                null_sink_module = m["id"]
+            elif m["name"] == "module-remap-source" and source_arg.search(m["args"]):
+                remap_source_module = m["id"]
+        return null_sink_module, remap_source_module
+
+    def _unload_pipe_modules(self, null_sink_module: str | None, remap_source_module: str | None) -> None:
+        """Unload a pipe's modules, remap source first since it depends on the null sink's monitor."""
         if remap_source_module:
             logger.debug(f"Unloading remap source module {remap_source_module}")
             subprocess.run(
@@ -282,236 +419,310 @@ class PulseAudioDeviceManager(DeviceManager):
                 text=True,
                 check=True,
             )
-        logger.info(f"Removed virtual pipe '{name}'")
 
     def play(self, device: OutputDevice, audio_data: typing.IO[bytes], raw: bool) -> None:
         """Play audio from the IO stream to the specified output device."""
-        logger.info(f"Playing audio to device '{device.name}' (raw={raw})")
-        cmd = ["paplay", "--device", device.name]
+        self._play(device.name, audio_data, raw, device.sample_format, device.channels, device.sample_rate)
+
+    def play_by_name(self, name: str, audio_data: typing.IO[bytes], raw: bool) -> None:
+        """Play audio from the IO stream to the output device with the given name.
+
+        paplay resolves the name itself, so no device listing is needed. Raw audio is
+        assumed to be s16le, 2 channels, 44100 Hz.
+        """
+        self._play(name, audio_data, raw, RAW_SAMPLE_FORMAT, RAW_CHANNELS, RAW_SAMPLE_RATE)
+
+    def record(
+        self,
+        device: InputDevice,
+        audio_data: typing.IO[bytes],
+        duration: float,
+        raw: bool,
+        *,
+        stop: threading.Event | None = None,
+        latency_msec: int | None = None,
+    ) -> None:
+        """Record audio from the specified input device to the IO stream for the given duration.
+
+        If stop is given, setting it ends the recording early. latency_msec asks PulseAudio to
+        deliver the audio in fragments of about that length instead of its default of ~2s.
+        """
+        self._record(
+            device.name,
+            audio_data,
+            duration,
+            raw,
+            device.sample_format,
+            device.channels,
+            device.sample_rate,
+            stop,
+            latency_msec,
+        )
+
+    def record_by_name(self, name: str, audio_data: typing.IO[bytes], duration: float, raw: bool) -> None:
+        """Record audio from the input device with the given name to the IO stream for the given duration.
+
+        parecord resolves the name itself, so no device listing is needed. Raw audio is
+        recorded as s16le, 2 channels, 44100 Hz.
+        """
+        self._record(name, audio_data, duration, raw, RAW_SAMPLE_FORMAT, RAW_CHANNELS, RAW_SAMPLE_RATE)
+
+    def _play(
+        self,
+        name: str,
+        audio_data: typing.IO[bytes],
+        raw: bool,
+        sample_format: str,
+        channels: int,
+        sample_rate: int,
+    ) -> None:
+        """Run paplay against the named sink, using the given sample spec for raw audio."""
+        logger.info(f"Playing audio to device '{name}' (raw={raw})")
+        cmd = ["paplay", "--device", name]
         if raw:
             cmd.extend(
                 [
                     "--raw",
                     "--rate",
-                    str(device.sample_rate),
+                    str(sample_rate),
                     "--channels",
-                    str(device.channels),
+                    str(channels),
                     "--format",
-                    device.sample_format,
+                    sample_format,
                 ]
             )
         logger.debug(f"Running command: {' '.join(cmd)}")
         process = subprocess.Popen(
             cmd,
             stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
             stderr=subprocess.PIPE,
         )
-        audio_data.seek(0)
-        audio_bytes = audio_data.read()
-        logger.debug(f"Playing {len(audio_bytes)} bytes of audio data")
-        stdout, stderr = process.communicate(input=audio_bytes)
+        assert process.stdin is not None and process.stderr is not None
+        if audio_data.seekable():
+            audio_data.seek(0)
+        try:
+            # Feed paplay as we read so playback starts right away and memory stays bounded
+            shutil.copyfileobj(audio_data, process.stdin, length=64 * 1024)
+        except BrokenPipeError:
+            logger.debug("paplay closed its input early")
+        finally:
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+        process.wait()
+        # paplay only writes short diagnostics, so reading stderr after it exits can't fill the pipe
+        stderr = process.stderr.read()
+        process.stderr.close()
         if process.returncode != 0:
             error_msg = stderr.decode()
             logger.error(f"paplay failed: {error_msg}")
             raise RuntimeError(f"paplay failed: {error_msg}")
-        logger.info(f"Successfully played audio to device '{device.name}'")
-
-    def record(self, device: InputDevice, audio_data: typing.IO[bytes], duration: float, raw: bool) -> None:
-        """Record audio from the specified input device to the IO stream for the given duration."""
-        import os
-        import tempfile
+        logger.info(f"Successfully played audio to device '{name}'")
 
-        logger.info(f"Recording audio from device '{device.name}' for {duration}s (raw={raw})")
-        with tempfile.NamedTemporaryFile(suffix=".wav" if not raw else ".raw", delete=False) as tmp_file:
-            tmp_path = tmp_file.name
-        cmd = ["parecord", "--device", device.name]
-        if raw:
-            cmd.extend(
-                [
-                    "--raw",
-                    "--rate",
-                    str(device.sample_rate),
-                    "--channels",
-                    str(device.channels),
-                    "--format",
-                    device.sample_format,
-                    tmp_path,
-                ]
-            )
-        else:
-            cmd.extend(["--file-format=wav", tmp_path])
+    def _record(
+        self,
+        name: str,
+        audio_data: typing.IO[bytes],
+        duration: float,
+        raw: bool,
+        sample_format: str,
+        channels: int,
+        sample_rate: int,
+        stop: threading.Event | None = None,
+        latency_msec: int | None = None,
+    ) -> None:
+        """Run parecord against the named source, using the given sample spec for raw audio."""
+        logger.info(f"Recording audio from device '{name}' for {duration}s (raw={raw})")
+        wav: wave.Wave_write | None = None
+        if not raw:
+            # parecord can't finalize a WAV header when writing to a pipe, so capture raw PCM
+            # in parecord's default spec and write the container ourselves
+            sample_format, channels, sample_rate = RAW_SAMPLE_FORMAT, RAW_CHANNELS, RAW_SAMPLE_RATE
+            if audio_data.seekable():
+                wav = wave.open(audio_data, "wb")
+                wav.setnchannels(channels)
+                wav.setsampwidth(2)
+                wav.setframerate(sample_rate)
+            else:
+                # wave seeks back to patch in the sizes on close, which a pipe can't do
+                audio_data.write(_streaming_wav_header(channels, 2, sample_rate))
+        cmd = [
+            "parecord",
+            "--device",
+            name,
+            "--raw",
+            "--rate",
+            str(sample_rate),
+            "--channels",
+            str(channels),
+            "--format",
+            sample_format,
+        ]
+        if latency_msec is not None:
+            cmd.append(f"--latency-msec={latency_msec}")
         logger.debug(f"Running command: {' '.join(cmd)}")
         process = subprocess.Popen(
             cmd,
-            stdin=subprocess.PIPE,
+            stdin=subprocess.DEVNULL,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
         )
-        try:
-            logger.debug(f"Waiting for recording to complete (timeout: {duration}s)")
-            process.wait(timeout=duration)
-        except subprocess.TimeoutExpired:
-            logger.debug("Recording timeout expired, terminating process")
+        assert process.stdout is not None and process.stderr is not None
+        stdout = typing.cast(io.BufferedReader, process.stdout)
+        write = wav.writeframesraw if wav is not None else audio_data.write
+        recorded = 0
+        copy_error: BaseException | None = None
+
+        def copy() -> None:
+            nonlocal recorded, copy_error
+            try:
+                # read1 hands over whatever parecord has delivered instead of waiting for a full block
+                while chunk := stdout.read1(64 * 1024):
+                    write(chunk)
+                    recorded += len(chunk)
+            except BaseException as e:
+                copy_error = e
+
+        copy_thread = threading.Thread(target=copy, daemon=True)
+        copy_thread.start()
+        logger.debug(f"Waiting for recording to complete (timeout: {duration}s)")
+        deadline = time.monotonic() + duration
+        # Return as soon as parecord exits on its own (e.g. it failed), stop is set or the duration is up
+        while process.poll() is None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.debug("Recording timeout expired, terminating process")
+                break
+            if stop is None:
+                try:
+                    process.wait(timeout=remaining)
+                except subprocess.TimeoutExpired:
+                    pass
+            elif stop.wait(timeout=min(remaining, 0.05)):
+                logger.debug("Recording stopped early")
+                break
+        if process.poll() is None:
             process.terminate()
             process.wait()
+        copy_thread.join()
+        stdout.close()
+        stderr = process.stderr.read().decode()
+        process.stderr.close()
+        if wav is not None:
+            wav.close()
         if process.returncode not in (0, -15):
-            stderr = process.stderr.read().decode() if process.stderr else ""
             logger.error(f"parecord failed: {stderr}")
             raise RuntimeError(f"parecord failed: {stderr}")
-        with open(tmp_path, "rb") as f:
-            recorded_bytes = f.read()
-            logger.debug(f"Recorded {len(recorded_bytes)} bytes")
-            audio_data.write(recorded_bytes)
-        os.unlink(tmp_path)
-        logger.info(f"Successfully recorded audio from device '{device.name}'")
-
-    def _get_sink_details(self, name: str) -> dict[str, typing.Any]:
-        """Get detailed information about a sink."""
-        logger.debug(f"Getting details for sink: {name}")
-        result = subprocess.run(
-            ["pactl", "list", "sinks"],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        details = self._parse_device_details(result.stdout, name)
-        logger.debug(f"Sink '{name}' details: {details}")
-        return details
-
-    def _get_source_details(self, name: str) -> dict[str, typing.Any]:
-        """Get detailed information about a source."""
-        logger.debug(f"Getting details for source: {name}")
-        result = subprocess.run(
-            ["pactl", "list", "sources"],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        details = self._parse_device_details(result.stdout, name)
-        logger.debug(f"Source '{name}' details: {details}")
-        return details
-
-    def _parse_device_details(self, output: str, name: str) -> dict[str, typing.Any]:
-        """Parse device details from pactl output."""
-        details: dict[str, typing.Any] = {
+        if copy_error is not None:
+            raise copy_error
+        logger.debug(f"Recorded {recorded} bytes")
+        logger.info(f"Successfully recorded audio from device '{name}'")
+
+    def _parse_all_device_details(self, output: str) -> dict[str, dict[str, typing.Any]]:
+        """Parse the details of every device in pactl output in one pass, keyed by device name."""
+        devices: dict[str, dict[str, typing.Any]] = {}
+        details: dict[str, typing.Any] | None = None
+        index: int | None = None
+        in_properties = False
+        for m in _PACTL_RE.finditer(output):
+            if m["header"] is not None:
+                details = None
+                index = int(m["index"])
+                in_properties = False
+                continue
+            field = m["field"]
+            if field is None:
+                if details is not None and in_properties:
+                    details["properties"][m["key"]] = m["prop"].strip('"')
+                continue
+            in_properties = False
+            value = m["value"].strip()
+            if field == "Name":
+                details = self._default_device_details(value)
+                details["index"] = index
+                devices[value] = details
+            elif details is None:
+                continue
+            elif field == "Properties":
+                in_properties = True
+                details["properties"] = {}
+            elif handler := _FIELD_HANDLERS.get(field):
+                handler(details, value)
+        return devices
+
+    def _default_device_details(self, name: str) -> dict[str, typing.Any]:
+        """Details assumed for a device that pactl doesn't describe."""
+        return {
             "description": name,
+            "index": None,
             "sample_format": "s16le",
             "channels": 2,
             "sample_rate": 48000,
             "mute": False,
             "volume": "",
-            "virtual": False,
+            "virtual": "null" in name.lower(),
             "properties": {},
+            "owner_module": None,
         }
-        in_device = False
-        in_properties = False
-        current_properties: dict[str, str] = {}
-        owner_module = None
-        driver = None
-        for line in output.split("\n"):
-            line = line.rstrip()
-            if line.startswith("Sink #") or line.startswith("Source #"):
-                in_device = False
-                in_properties = False
-            if f"Name: {name}" in line:
-                in_device = True
-                continue
-            if not in_device:
-                continue
-            if line.startswith("\tName:"):
-                if line.split(":", 1)[1].strip() != name:
-                    in_device = False
-                    continue
-            if line.startswith("\tDescription:"):
-                details["description"] = line.split(":", 1)[1].strip()
-            elif line.startswith("\tDriver:"):
-                driver = line.split(":", 1)[1].strip()
-            elif line.startswith("\tOwner Module:"):
-                owner_module = line.split(":", 1)[1].strip()
-            elif line.startswith("\tSample Specification:"):
-                spec = line.split(":", 1)[1].strip()
-                parts = spec.split()
-                if parts:
-                    details["sample_format"] = parts[0]
-                    for part in parts[1:]:
-                        if part.endswith("ch"):
-                            details["channels"] = int(part[:-2])
-                        elif part.endswith("Hz"):
-                            details["sample_rate"] = int(part[:-2])
-            elif line.startswith("\tMute:"):
-                details["mute"] = line.split(":", 1)[1].strip().lower() == "yes"
-            elif line.startswith("\tVolume:"):
-                details["volume"] = line.split(":", 1)[1].strip()
-            elif line.startswith("\tProperties:"):
-                in_properties = True
-                current_properties = {}
-            elif in_properties:
-                if line.startswith("\t\t"):
-                    prop_line = line.strip()
-                    if "=" in prop_line:
-                        key, value = prop_line.split("=", 1)
-                        current_properties[key.strip()] = value.strip().strip('"')
-                elif line.startswith("\t") and not line.startswith("\t\t"):
-                    in_properties = False
-                    details["properties"] = current_properties
-            elif line.startswith("\t") and not line.startswith("\t\t"):
-                in_properties = False
-        if in_properties:
-            details["properties"] = current_properties
-        is_virtual = (
-            "null" in name.lower()
-            or (driver and "null" in driver.lower())
-            or (owner_module and owner_module != "n/a" and "null" in owner_module.lower())
+
+    def _created_device_details(
+        self, name: str, description: str, pulse_description: str, owner_module: int
+    ) -> dict[str, typing.Any]:
+        """Details for a device soundpasta just loaded, known without asking pactl (index and volume stay unset).
+
+        The pipe's modules are loaded without a sample spec, so they take the server's default one.
+        pulse_description is the device.description property PulseAudio gives the device, and owner_module
+        the module that loaded it.
+        """
+        return (
+            self._default_device_details(name)
+            | self._default_sample_spec()
+            | {
+                "description": description,
+                "virtual": True,
+                "properties": {"device.description": pulse_description},
+                "owner_module": owner_module,
+            }
         )
-        details["virtual"] = is_virtual
-        return details
 
-    def _ensure_role_suffix(self, description: str, suffix: str) -> str:
-        """Append or normalize a role-specific suffix in a description string."""
-        if description.endswith(suffix):
-            return description
-        if self.pipe_suffix and description.endswith(self.pipe_suffix):
-            return f"{description[: -len(self.pipe_suffix)]}{suffix}"
-        # If description includes '-pipe' suffix, drop it before appending desired role suffix
-        if description.endswith("-pipe"):
-            base = description[: -len("-pipe")]
-            return f"{base}{suffix}"
-        return f"{description}{suffix}"
+    def _default_sample_spec(self) -> dict[str, typing.Any]:
+        """The server's default sample spec, as sample_format/channels/sample_rate details."""
+        return self._cached("default_sample_spec", self._query_default_sample_spec)
+
+    def _query_default_sample_spec(self) -> dict[str, typing.Any]:
+        """Read the default sample spec from `pactl info`, which is much shorter than listing every device."""
+        result = subprocess.run(
+            ["pactl", "info"],
+            stdout=subprocess.PIPE,
+            env={**os.environ, "LC_ALL": "C"},
+            check=True,
+        )
+        details: dict[str, typing.Any] = {}
+        found = _DEFAULT_SAMPLE_SPEC_RE.search(result.stdout.decode("utf-8", "replace"))
+        if found:
+            _set_sample_spec(details, found["spec"])
+        return details
 
     def _normalize_role_description(self, description: str, suffix: str) -> str:
         """Normalize description to base name + desired role suffix, stripping existing role or '-pipe' suffixes."""
-        base = description
-        # Strip known role suffixes
-        for s in (self._input_suffix, self._output_suffix, self._monitor_suffix):
-            if base.endswith(s):
-                base = base[: -len(s)]
-                break
-        # Strip generic configured pipe suffix
-        if self.pipe_suffix and base.endswith(self.pipe_suffix):
-            base = base[: -len(self.pipe_suffix)]
-        # Strip '-pipe' if present
-        if base.endswith("-pipe"):
-            base = base[: -len("-pipe")]
-        return f"{base}{suffix}"
+        return self._role_suffix_re.sub("", description, count=1) + suffix
 
     def _ensure_config_include(self) -> None:
         """Ensure .include soundpasta.pa exists in default.pa."""
-        if not self._default_config_file.exists():
-            self._pulse_config_dir.mkdir(parents=True, exist_ok=True)
-            with open(self._default_config_file, "w") as f:
-                f.write(".include soundpasta.pa\n")
-            logger.debug(f"Created default.pa with include directive")
-            return
-
-        with open(self._default_config_file, "r") as f:
-            content = f.read()
-
+        self._pulse_config_dir.mkdir(parents=True, exist_ok=True)
         include_line = ".include soundpasta.pa"
-        if include_line not in content:
-            with open(self._default_config_file, "a") as f:
-                f.write(f"\n{include_line}\n")
-            logger.debug(f"Added include directive to default.pa")
+        # One open in append mode creates the file if needed and lets us read it before appending
+        with open(self._default_config_file, "a+") as f:
+            f.seek(0)
+            content = f.read()
+            if include_line in content:
+                return
+            if content and not content.endswith("\n"):
+                f.write("\n")
+            f.write(f"{include_line}\n")
+        logger.debug("Added include directive to default.pa")
 
     def _write_pipe_to_config(
         self,
@@ -524,25 +735,21 @@ class PulseAudioDeviceManager(DeviceManager):
         source_description: str,
     ) -> None:
         """Write pipe module-load commands to soundpasta.pa config file."""
+        self.invalidate()
         self._ensure_config_include()
-        self._pulse_config_dir.mkdir(parents=True, exist_ok=True)
 
         null_sink_line = (
             f"load-module module-null-sink sink_name={sink_name} sink_properties=device.description={sink_description}"
         )
         remap_source_line = f"load-module module-remap-source source_name={source_name} master={monitor_name} source_properties=device.description={source_description}"
 
-        if self._soundpasta_config_file.exists():
-            with open(self._soundpasta_config_file, "r") as f:
-                content = f.read()
-            if sink_name in content and source_name in content:
-                logger.debug(f"Pipe '{name}' already in config file, skipping")
-                return
-        else:
-            content = ""
+        if self._config_contains(f"sink_name={sink_name}", f"source_name={source_name}"):
+            logger.debug(f"Pipe '{name}' already in config file, skipping")
+            return
+        needs_newline = self._config_lacks_final_newline()
 
         with open(self._soundpasta_config_file, "a") as f:
-            if content and not content.endswith("\n"):
+            if needs_newline:
                 f.write("\n")
             f.write(f"# Soundpasta pipe: {name} ({pipe_type.value})\n")
             f.write(f"{null_sink_line}\n")
@@ -551,6 +758,7 @@ class PulseAudioDeviceManager(DeviceManager):
 
     def _remove_pipe_from_config(self, name: str, pipe_type: PipeType) -> None:
         """Remove pipe module-load commands from soundpasta.pa config file."""
+        self.invalidate()
         if not self._soundpasta_config_file.exists():
             return
 
@@ -561,21 +769,20 @@ class PulseAudioDeviceManager(DeviceManager):
             sink_name = name
             source_name = f"{name}-pipe"
 
-        with open(self._soundpasta_config_file, "r") as f:
+        # Match names exactly, like _load_config_pipe_names, so removing "foo" leaves "foobar" alone
+        sink_arg = _token_re(f"sink_name={sink_name}")
+        source_arg = _token_re(f"source_name={source_name}")
+        with open(self._soundpasta_config_file) as f:
             lines = f.readlines()
 
         new_lines = []
-        skip_next = 0
-        for i, line in enumerate(lines):
-            if skip_next > 0:
-                skip_next -= 1
+        for line in lines:
+            header = _CONFIG_PIPE_RE.match(line)
+            if header and header["name"] == name:
                 continue
-            if f"# Soundpasta pipe: {name}" in line:
-                skip_next = 2
+            if "module-null-sink" in line and sink_arg.search(line):
                 continue
-            if sink_name in line and "module-null-sink" in line:
-                continue
-            if source_name in line and "module-remap-source" in line:
+            if "module-remap-source" in line and source_arg.search(line):
                 continue
             new_lines.append(line)
 
@@ -583,19 +790,30 @@ class PulseAudioDeviceManager(DeviceManager):
             f.writelines(new_lines)
         logger.info(f"Removed pipe '{name}' from config file")
 
-    def _is_pipe_in_config(self, name: str, pipe_type: PipeType) -> bool:
-        """Check if pipe exists in soundpasta.pa config file."""
+    def _load_config_pipe_names(self) -> set[str]:
+        """Read soundpasta.pa once and return the names of the pipes it persists."""
         if not self._soundpasta_config_file.exists():
-            return False
+            return set()
+        return {m["name"] for m in _CONFIG_PIPE_RE.finditer(self._soundpasta_config_file.read_text())}
 
-        if pipe_type == PipeType.INPUT:
-            sink_name = f"{name}-pipe"
-            source_name = name
-        else:
-            sink_name = name
-            source_name = f"{name}-pipe"
-
-        with open(self._soundpasta_config_file, "r") as f:
-            content = f.read()
-
-        return sink_name in content and source_name in content and f"# Soundpasta pipe: {name}" in content
+    def _config_contains(self, *markers: str) -> bool:
+        """Check whether every marker appears as a whole word in soundpasta.pa, reading only until all are seen."""
+        if not self._soundpasta_config_file.exists():
+            return False
+        pending = {_token_re(marker) for marker in markers}
+        with open(self._soundpasta_config_file) as f:
+            for line in f:
+                pending = {marker for marker in pending if not marker.search(line)}
+                if not pending:
+                    return True
+        return False
+
+    def _config_lacks_final_newline(self) -> bool:
+        """Check whether soundpasta.pa is non-empty and doesn't end with a newline."""
+        if not self._soundpasta_config_file.exists():
+            return False
+        with open(self._soundpasta_config_file, "rb") as f:
+            if f.seek(0, os.SEEK_END) == 0:
+                return False
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b"\n"
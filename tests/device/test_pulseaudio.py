@@ -1,21 +1,39 @@
 # mypy: disable-error-code=no-untyped-def
 
+import asyncio
+import dataclasses
+import functools
 import io
+import math
 import os
 import shutil
 import subprocess
-import tempfile
+import sys
 import threading
-import time
 import typing
+import wave
+from collections.abc import Buffer
+from pathlib import Path
 from uuid import uuid4
 
 import numpy
 import pytest
 import soundfile  # type: ignore[import-untyped]
+from pytest_mock import MockerFixture
 
 from soundpasta.device.models import InputDevice, OutputDevice, PipeType
-from soundpasta.device.pulseaudio import PulseAudioDeviceManager
+from soundpasta.device.pulseaudio import (
+    _PACTL_RE,
+    RAW_CHANNELS,
+    RAW_SAMPLE_FORMAT,
+    RAW_SAMPLE_RATE,
+    PulseAudioDeviceManager,
+)
+
+SOX = shutil.which("sox") or "sox"
+DTMF2NUM = shutil.which("dtmf2num") or "dtmf2num"
+# sox input options matching PulseAudioDeviceManager's raw sample spec (s16le)
+RAW_SOX_INPUT = ("-t", "raw", "-r", str(RAW_SAMPLE_RATE), "-c", str(RAW_CHANNELS), "-e", "signed", "-b", "16", "-L")
 
 DTMF_FREQUENCIES = {
     "0": (941, 1336),
@@ -31,63 +49,25 @@ DTMF_FREQUENCIES = {
 }
 
 
-def generate_dtmf_tone_wav(
-    output_path: str, digit: str, duration: float, sample_rate: int = 44100, leading_silence: float = 0.5
-) -> None:
-    """Generate a DTMF tone WAV file for a single digit."""
+def dtmf_tone(digit: str, duration: float, sample_rate: int = 44100) -> numpy.ndarray:
+    """Synthesize a stereo DTMF tone for a single digit."""
     freq1, freq2 = DTMF_FREQUENCIES[digit]
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
-        tone_path = tmp_file.name
-    try:
-        subprocess.run(
-            [
-                "sox",
-                "-n",
-                "-r",
-                str(sample_rate),
-                "-c",
-                "2",
-                "-b",
-                "16",
-                tone_path,
-                "synth",
-                str(duration),
-                "sine",
-                str(freq1),
-                "sine",
-                str(freq2),
-            ],
-            check=True,
-        )
-        if leading_silence > 0:
-            silence_path = f"{tone_path}.silence.wav"
-            subprocess.run(
-                [
-                    "sox",
-                    "-n",
-                    "-r",
-                    str(sample_rate),
-                    "-c",
-                    "2",
-                    "-b",
-                    "16",
-                    silence_path,
-                    "synth",
-                    str(leading_silence),
-                    "sine",
-                    "0",
-                ],
-                check=True,
-            )
-            subprocess.run(
-                ["sox", "--combine", "concatenate", silence_path, tone_path, output_path],
-                check=True,
-            )
-            cleanup_temp_files(silence_path)
-        else:
-            shutil.copy(tone_path, output_path)
-    finally:
-        cleanup_temp_files(tone_path)
+    t = numpy.arange(int(sample_rate * duration)) / sample_rate
+    tone = (0.5 * (numpy.sin(2 * numpy.pi * freq1 * t) + numpy.sin(2 * numpy.pi * freq2 * t))).astype(numpy.float32)
+    return numpy.broadcast_to(tone[:, None], (len(tone), 2))
+
+
+# Shared read-only zeros that silence() hands out views of, so padding doesn't allocate
+_SILENCE_STEREO = numpy.zeros((int(44100 * 2.5), 2), dtype=numpy.float32)
+_SILENCE_STEREO.setflags(write=False)
+
+
+def silence(duration: float, sample_rate: int = 44100) -> numpy.ndarray:
+    """Synthesize stereo silence."""
+    n = int(sample_rate * duration)
+    if n <= len(_SILENCE_STEREO):
+        return _SILENCE_STEREO[:n]
+    return numpy.zeros((n, 2), dtype=numpy.float32)
 
 
 def generate_dtmf_sequence_wav(
@@ -99,170 +79,197 @@ def generate_dtmf_sequence_wav(
     leading_silence: float = 0.5,
 ) -> None:
     """Generate a WAV file containing a sequence of DTMF tones with pauses."""
-    tone_files = []
-    if leading_silence > 0:
-        silence_file = f"{output_path}.leading_silence.wav"
-        tone_files.append(silence_file)
-        subprocess.run(
-            [
-                "sox",
-                "-n",
-                "-r",
-                str(sample_rate),
-                "-c",
-                "2",
-                "-b",
-                "16",
-                silence_file,
-                "synth",
-                str(leading_silence),
-                "sine",
-                "0",
-            ],
-            check=True,
-        )
+    pause = silence(pause_duration, sample_rate)
+    tones = {digit: dtmf_tone(digit, tone_duration, sample_rate) for digit in set(digits)}
+    parts = [silence(leading_silence, sample_rate)]
     for i, digit in enumerate(digits):
-        freq1, freq2 = DTMF_FREQUENCIES[digit]
-        tone_file = f"{output_path}.tone{i}.wav"
-        tone_files.append(tone_file)
-        subprocess.run(
-            [
-                "sox",
-                "-n",
-                "-r",
-                str(sample_rate),
-                "-c",
-                "2",
-                "-b",
-                "16",
-                tone_file,
-                "synth",
-                str(tone_duration),
-                "sine",
-                str(freq1),
-                "sine",
-                str(freq2),
-            ],
-            check=True,
-        )
-        if i < len(digits) - 1:
-            pause_file = f"{output_path}.pause{i}.wav"
-            tone_files.append(pause_file)
-            subprocess.run(
-                [
-                    "sox",
-                    "-n",
-                    "-r",
-                    str(sample_rate),
-                    "-c",
-                    "2",
-                    "-b",
-                    "16",
-                    pause_file,
-                    "synth",
-                    str(pause_duration),
-                    "sine",
-                    "0",
-                ],
-                check=True,
-            )
-    if len(tone_files) > 1:
-        subprocess.run(
-            ["sox", "--combine", "concatenate"] + tone_files + [output_path],
-            check=True,
-        )
-    else:
-        shutil.copy(tone_files[0], output_path)
-    for f in tone_files:
-        if os.path.exists(f):
-            os.unlink(f)
+        if i > 0:
+            parts.append(pause)
+        parts.append(tones[digit])
+    soundfile.write(output_path, numpy.concatenate(parts), sample_rate, subtype="PCM_16")
 
 
 def generate_sine_wave_wav(output_path: str, frequency: float, duration: float, sample_rate: int = 44100) -> None:
     """Generate a sine wave WAV file."""
-    t = numpy.linspace(0, duration, int(sample_rate * duration), False)
-    sine_wave = numpy.sin(2 * numpy.pi * frequency * t)
-    soundfile.write(output_path, sine_wave, sample_rate)
+    sine_wave = numpy.arange(int(sample_rate * duration), dtype=numpy.float32)
+    sine_wave *= numpy.float32(2 * numpy.pi * frequency / sample_rate)
+    numpy.sin(sine_wave, out=sine_wave)
+    soundfile.write(output_path, sine_wave, sample_rate, subtype="PCM_16")
 
 
 def convert_wav_to_mono_8khz(input_path: str, output_path: str) -> None:
     """Convert a WAV file to mono 8kHz format for DTMF detection."""
     subprocess.run(
-        ["sox", input_path, "-r", "8000", "-c", "1", output_path],
+        [SOX, input_path, "-r", "8000", "-c", "1", output_path],
         check=True,
     )
 
 
+def goertzel_power(samples: list[float], k: int) -> float:
+    """Power |X[k]|**2 of DFT bin k of samples, via the Goertzel recurrence: O(N) time and O(1) memory."""
+    coeff = 2 * math.cos(2 * math.pi * k / len(samples))
+    s1 = s2 = 0.0
+    for x in samples:
+        s1, s2 = x + coeff * s1 - s2, s1
+    return s1 * s1 + s2 * s2 - coeff * s1 * s2
+
+
+def parse_dtmf_numbers(output: bytes) -> str:
+    """Extract the digits from dtmf2num's "DTMF numbers:" line."""
+    marker = b"DTMF numbers:"
+    start = output.find(marker)
+    if start < 0:
+        return ""
+    end = output.find(b"\n", start)
+    return output[start + len(marker) : end if end >= 0 else None].split(b":", 1)[0].strip().decode("ascii")
+
+
 def detect_dtmf_digits(wav_path: str) -> str:
     """Detect DTMF digits from a WAV file using dtmf2num."""
     result = subprocess.run(
-        ["dtmf2num", wav_path],
-        capture_output=True,
-        text=True,
+        [DTMF2NUM, wav_path],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
         check=False,
     )
-    output_lines = result.stdout.strip().split("\n") + result.stderr.strip().split("\n")
-    for line in output_lines:
-        line = line.strip()
-        if "DTMF numbers:" in line:
-            parts = line.split(":")
-            if len(parts) > 1:
-                return parts[1].strip()
-    return ""
+    return parse_dtmf_numbers(result.stdout)
 
 
-def save_bytesio_to_file(data: io.BytesIO, file_path: str) -> None:
-    """Save BytesIO content to a file."""
-    data.seek(0)
-    recorded_bytes = data.read()
-    with open(file_path, "wb") as f:
-        f.write(recorded_bytes)
+def start_dtmf_detection(*input_args: str) -> tuple[subprocess.Popen[bytes], subprocess.Popen[bytes]]:
+    """Start sox converting audio on its stdin to mono 8kHz, piped straight into dtmf2num.
+
+    input_args are the sox options describing the audio that will be written to the returned sox's stdin.
+    """
+    sox = subprocess.Popen(
+        [SOX, *input_args, "-", "-r", "8000", "-c", "1", "-t", "wav", "-"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+    )
+    assert sox.stdout is not None
+    dtmf = subprocess.Popen(
+        [DTMF2NUM, "/dev/stdin"],
+        stdin=sox.stdout,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+    sox.stdout.close()
+    return sox, dtmf
+
+
+def finish_dtmf_detection(sox: subprocess.Popen[bytes], dtmf: subprocess.Popen[bytes]) -> str:
+    """Close sox's input and return the digits dtmf2num detected in it."""
+    assert sox.stdin is not None
+    try:
+        sox.stdin.close()
+    except BrokenPipeError:
+        pass
+    output, _ = dtmf.communicate()
+    sox.wait()
+    return parse_dtmf_numbers(output)
 
 
-def record_and_play_through_pipe(
+def save_bytesio_to_file(data: io.BytesIO, file_path: str) -> None:
+    """Save BytesIO content to a file."""
+    with open(file_path, "wb") as f, data.getbuffer() as view:
+        f.write(view)
+
+
+class RecordingBuffer(io.BytesIO):
+    """BytesIO that signals when recorded audio first arrives and keeps its latest samples for silence checks.
+
+    If sink is given, the audio is forwarded there as it arrives instead of being kept in memory.
+    """
+
+    def __init__(self, tail_bytes: int, sink: typing.IO[bytes] | None = None) -> None:
+        super().__init__()
+        self.started = threading.Event()
+        self.written = 0
+        self._tail = bytearray()
+        self._tail_bytes = tail_bytes
+        self._sink = sink
+
+    def write(self, data: Buffer, /) -> int:
+        view = memoryview(data).cast("B")
+        # Roll the window across writes, so it always spans the last tail_bytes however parecord chunks them
+        self._tail += view[-self._tail_bytes :]
+        del self._tail[: -self._tail_bytes]
+        self.written += len(view)
+        self.started.set()
+        if self._sink is not None:
+            return self._sink.write(data)
+        return super().write(data)
+
+    def is_silent(self, threshold: float = 1e-3) -> bool:
+        """Whether a full window of the latest recorded s16le samples is below the given RMS level."""
+        if len(self._tail) < self._tail_bytes:
+            return False
+        samples = numpy.frombuffer(self._tail, dtype="<i2", count=len(self._tail) // 2) / 32768
+        return float(numpy.sqrt(numpy.mean(numpy.square(samples)))) < threshold
+
+
+async def record_and_play_through_pipe(
     device_manager: PulseAudioDeviceManager,
     sink_device: OutputDevice,
     monitor_source: InputDevice,
     audio_file_path: str,
     record_duration: float,
-    pre_play_delay: float = 1.2,
-    post_play_delay: float = 2.0,
-) -> io.BytesIO:
-    """Record audio from a monitor source while playing to a sink device."""
-    recorded_data = io.BytesIO()
-    recording_done = threading.Event()
-    recording_error = None
-
-    def record_audio():
-        nonlocal recording_error
+    start_timeout: float = 5.0,
+    silence_duration: float = 1.0,
+    sink: typing.IO[bytes] | None = None,
+) -> RecordingBuffer:
+    """Record audio from a monitor source while playing to a sink device.
+
+    Playback starts as soon as the recording delivers its first audio, and the recording stops once
+    playback has finished and the last silence_duration seconds recorded are silent. record_duration
+    only bounds how long the recording may run. silence_duration must be longer than the longest pause
+    in the audio plus the capture latency, or a pause could end the recording early.
+
+    The recording is a WAV file kept in the returned buffer, unless sink is given: then it's streamed
+    to sink as raw PCM in the RAW_* sample spec, since a WAV header can't be finalized on a pipe.
+    """
+    tail_bytes = int(silence_duration * RAW_SAMPLE_RATE) * RAW_CHANNELS * 2
+    recorded_data = RecordingBuffer(tail_bytes=tail_bytes, sink=sink)
+    if sink is not None:
+        monitor_source = dataclasses.replace(
+            monitor_source, sample_format=RAW_SAMPLE_FORMAT, channels=RAW_CHANNELS, sample_rate=RAW_SAMPLE_RATE
+        )
+    stop_recording = threading.Event()
+    recording = asyncio.create_task(
+        asyncio.to_thread(
+            device_manager.record,
+            monitor_source,
+            recorded_data,
+            record_duration,
+            raw=sink is not None,
+            stop=stop_recording,
+            latency_msec=50,
+        )
+    )
+    try:
+        loop = asyncio.get_running_loop()
+        start_deadline = loop.time() + start_timeout
+        # Poll instead of blocking on started, so a failing parecord surfaces as its own error
+        while not recorded_data.started.is_set():
+            if recording.done():
+                recording.result()
+                raise RuntimeError("Recording ended before delivering any audio")
+            if loop.time() >= start_deadline:
+                raise RuntimeError("Recording did not start in time")
+            await asyncio.sleep(0.05)
+        with open(audio_file_path, "rb") as audio_file:
+            await asyncio.to_thread(device_manager.play, sink_device, audio_file, raw=False)
+        while not recording.done() and not recorded_data.is_silent():
+            await asyncio.sleep(0.05)
+    finally:
+        stop_recording.set()
+        # Always collect the recording, so its exception is raised instead of being lost with the task
         try:
-            device_manager.record(monitor_source, recorded_data, record_duration, raw=False)
-        except Exception as e:
-            recording_error = e
-        finally:
-            recording_done.set()
-
-    record_thread = threading.Thread(target=record_audio, daemon=True)
-    record_thread.start()
-    time.sleep(pre_play_delay)
-    with open(audio_file_path, "rb") as audio_file:
-        device_manager.play(sink_device, audio_file, raw=False)
-    time.sleep(post_play_delay)
-    if not recording_done.wait(timeout=record_duration + 1.0):
-        raise RuntimeError("Recording did not complete in time")
-    record_thread.join(timeout=1.0)
-    if recording_error:
-        raise recording_error
+            await asyncio.wait_for(recording, timeout=record_duration + 1.0)
+        except TimeoutError:
+            raise RuntimeError("Recording did not complete in time") from None
     return recorded_data
 
 
-def cleanup_temp_files(*file_paths: str) -> None:
-    """Remove temporary files if they exist."""
-    for path in file_paths:
-        if os.path.exists(path):
-            os.unlink(path)
-
-
 def get_or_create_pipe(device_manager: PulseAudioDeviceManager, pipe_name: str, pipe_type: PipeType):
     """Get an existing pipe or create a new one if it doesn't exist."""
     pipes = device_manager.list_pipes()
@@ -277,15 +284,240 @@ def device_manager() -> PulseAudioDeviceManager:
     return PulseAudioDeviceManager()
 
 
+@pytest.fixture
+def isolated_device_manager(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> PulseAudioDeviceManager:
+    """A device manager whose pulse config directory lives under tmp_path."""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    return PulseAudioDeviceManager()
+
+
+@pytest.fixture(scope="module")
+def tmp_dir(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    return tmp_path_factory.mktemp("soundpasta-pulseaudio")
+
+
+@pytest.fixture(scope="session")
+def dtmf_wav_factory(tmp_path_factory: pytest.TempPathFactory) -> typing.Callable[..., str]:
+    """Generate each distinct DTMF sequence WAV once per session and return its path."""
+    cache_dir = tmp_path_factory.mktemp("dtmf-cache")
+
+    @functools.cache
+    def factory(digits: str, tone_duration: float, pause_duration: float, sample_rate: int = 44100) -> str:
+        path = str(cache_dir / f"dtmf_{digits}_{tone_duration}_{pause_duration}_{sample_rate}.wav")
+        generate_dtmf_sequence_wav(path, digits, tone_duration, pause_duration, sample_rate)
+        return path
+
+    return factory
+
+
+@pytest.fixture(scope="session")
+def sine_wav_factory(tmp_path_factory: pytest.TempPathFactory) -> typing.Callable[..., str]:
+    """Generate each distinct sine wave WAV once per session and return its path."""
+    cache_dir = tmp_path_factory.mktemp("sine-cache")
+
+    @functools.cache
+    def factory(frequency: float, duration: float, sample_rate: int = 44100) -> str:
+        path = str(cache_dir / f"sine_{frequency}_{duration}_{sample_rate}.wav")
+        generate_sine_wave_wav(path, frequency, duration, sample_rate)
+        return path
+
+    return factory
+
+
 @pytest.fixture
 def virtual_sink(device_manager: PulseAudioDeviceManager) -> typing.Generator[str, None, None]:
-    pipe = device_manager.create_pipe(f"soundpasta-test_test_sink_{uuid4()}", PipeType.INPUT)
+    pipe = device_manager.create_pipe(f"soundpasta-test_test_sink_{os.getpid()}_{uuid4()}", PipeType.INPUT)
     try:
         yield pipe.name
     finally:
         device_manager.remove_pipe(pipe.name)
 
 
+PACTL_LIST_SINKS = """\
+Sink #0
+\tState: SUSPENDED
+\tName: alsa_output.pci.analog-stereo
+\tDescription: Built-in Audio Analog Stereo
+\tDriver: module-alsa-card.c
+\tSample Specification: s16le 2ch 44100Hz
+\tOwner Module: 7
+\tMute: no
+\tVolume: front-left: 65536 / 100% / 0.00 dB,   front-right: 65536 / 100% / 0.00 dB
+\t        balance 0.00
+\tProperties:
+\t\talsa.resolution_bits = "16"
+\t\tdevice.description = "Built-in Audio Analog Stereo"
+\tPorts:
+\t\tanalog-output-lineout: Line Out (type: Line, priority: 9900, availability unknown)
+\tFormats:
+\t\tpcm
+
+Sink #5
+\tState: IDLE
+\tName: mypipe-pipe
+\tDescription: mypipe-OutputPipe
+\tDriver: module-null-sink.c
+\tSample Specification: float32le 1ch 48000Hz
+\tOwner Module: 22
+\tMute: yes
+\tVolume: mono: 65536 / 100% / 0.00 dB
+\tProperties:
+\t\tdevice.class = "abstract"
+"""
+
+
+def test_parse_all_device_details(device_manager: PulseAudioDeviceManager) -> None:
+    devices = device_manager._parse_all_device_details(PACTL_LIST_SINKS)
+    assert list(devices) == ["alsa_output.pci.analog-stereo", "mypipe-pipe"]
+    assert devices["alsa_output.pci.analog-stereo"] == {
+        "description": "Built-in Audio Analog Stereo",
+        "index": 0,
+        "sample_format": "s16le",
+        "channels": 2,
+        "sample_rate": 44100,
+        "mute": False,
+        "volume": "front-left: 65536 / 100% / 0.00 dB,   front-right: 65536 / 100% / 0.00 dB",
+        "virtual": False,
+        "properties": {"alsa.resolution_bits": "16", "device.description": "Built-in Audio Analog Stereo"},
+        "owner_module": 7,
+    }
+    pipe_sink = devices["mypipe-pipe"]
+    assert pipe_sink["index"] == 5
+    assert pipe_sink["owner_module"] == 22
+    assert (pipe_sink["sample_format"], pipe_sink["channels"], pipe_sink["sample_rate"]) == ("float32le", 1, 48000)
+    assert pipe_sink["mute"] is True
+    assert pipe_sink["virtual"] is True
+    assert pipe_sink["properties"] == {"device.class": "abstract"}
+
+
+def test_list_outputs_parses_pactl_in_c_locale(
+    device_manager: PulseAudioDeviceManager, mocker: MockerFixture, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("LC_ALL", "de_DE.UTF-8")
+    run = mocker.patch(
+        "subprocess.run",
+        return_value=subprocess.CompletedProcess(["pactl"], 0, stdout=PACTL_LIST_SINKS.encode()),
+    )
+    devices = device_manager.list_outputs()
+    assert [(d.index, d.name) for d in devices] == [(0, "alsa_output.pci.analog-stereo"), (5, "mypipe-pipe")]
+    assert run.call_args.args[0] == ["pactl", "list", "sinks"]
+    assert run.call_args.kwargs["env"]["LC_ALL"] == "C"
+
+
+def test_cached_listings_return_own_properties(device_manager: PulseAudioDeviceManager, mocker: MockerFixture) -> None:
+    run = mocker.patch(
+        "subprocess.run",
+        return_value=subprocess.CompletedProcess(["pactl"], 0, stdout=PACTL_LIST_SINKS.encode()),
+    )
+    device_manager.list_outputs()[0].properties["alsa.resolution_bits"] = "24"
+    output = device_manager.get_output("alsa_output.pci.analog-stereo")
+    assert output is not None
+    assert output.properties["alsa.resolution_bits"] == "16"
+    assert device_manager.list_outputs()[0].properties["alsa.resolution_bits"] == "16"
+    run.assert_called_once()
+
+
+def test_record_wav_to_pipe(
+    device_manager: PulseAudioDeviceManager, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    pcm = bytes(range(256)) * 32
+    parecord = tmp_path / "parecord"
+    parecord.write_text(f"#!{sys.executable}\nimport sys\nsys.stdout.buffer.write({pcm!r})\n")
+    parecord.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    read_fd, write_fd = os.pipe()
+    with open(read_fd, "rb") as source:
+        with open(write_fd, "wb") as sink:
+            device_manager.record_by_name("test-source", sink, 5.0, raw=False)
+        recorded = source.read()
+    with wave.open(io.BytesIO(recorded)) as wav:
+        assert (wav.getnchannels(), wav.getsampwidth(), wav.getframerate()) == (RAW_CHANNELS, 2, RAW_SAMPLE_RATE)
+        assert wav.readframes(wav.getnframes()) == pcm
+
+
+def test_pactl_re() -> None:
+    listing = 'Source #7\n\tName: mic\n\tMute: no\n\tProperties:\n\t\tdevice.class = "sound"\n\t        balance 0.00\n'
+    matches = [{k: v for k, v in m.groupdict().items() if v is not None} for m in _PACTL_RE.finditer(listing)]
+    assert matches == [
+        {"header": "Source #7", "index": "7"},
+        {"field": "Name", "value": "mic"},
+        {"field": "Mute", "value": "no"},
+        {"field": "Properties", "value": ""},
+        {"key": "device.class", "prop": '"sound"'},
+    ]
+
+
+def test_cached_expires_after_ttl(mocker: MockerFixture) -> None:
+    device_manager = PulseAudioDeviceManager(cache_ttl=60)
+    fn = mocker.Mock(side_effect=[1, 2, 3])
+    assert device_manager._cached("key", fn) == 1
+    assert device_manager._cached("key", fn) == 1
+    device_manager.invalidate()
+    assert device_manager._cached("key", fn) == 2
+    device_manager._cache_ttl = 0
+    assert device_manager._cached("key", fn) == 3
+
+
+def test_remove_pipe_unloads_listed_owner_modules(
+    isolated_device_manager: PulseAudioDeviceManager, mocker: MockerFixture
+) -> None:
+    listings = {
+        ("sinks",): "Sink #3\n\tName: foo-pipe\n\tOwner Module: 40\n",
+        ("sources",): "Source #4\n\tName: foo-pipe.monitor\n\tOwner Module: 40\n"
+        "Source #5\n\tName: foo\n\tOwner Module: 41\n",
+    }
+    pactl_list = mocker.patch.object(isolated_device_manager, "_pactl_list", side_effect=lambda *args: listings[args])
+    run = mocker.patch("subprocess.run")
+    isolated_device_manager.remove_pipe("foo")
+    # Remap source first, and no `pactl list short modules` scan
+    assert [c.args[0][1:] for c in run.call_args_list] == [["unload-module", "41"], ["unload-module", "40"]]
+    assert {c.args for c in pactl_list.call_args_list} == {("sinks",), ("sources",)}
+
+
+def test_create_pipe_reports_server_default_sample_spec(
+    isolated_device_manager: PulseAudioDeviceManager, mocker: MockerFixture
+) -> None:
+    def run(cmd: list[str], **kwargs: typing.Any) -> subprocess.CompletedProcess[typing.Any]:
+        if cmd[1] == "info":
+            return subprocess.CompletedProcess(cmd, 0, stdout=b"Default Sample Specification: float32le 2ch 48000Hz\n")
+        return subprocess.CompletedProcess(cmd, 0, stdout="41\n")
+
+    run_mock = mocker.patch("subprocess.run", side_effect=run)
+    pipe = isolated_device_manager.create_pipe("foo", PipeType.INPUT)
+    for device in (pipe.sink, pipe.monitor, pipe.source):
+        assert (device.sample_format, device.channels, device.sample_rate) == ("float32le", 2, 48000)
+    # The modules are loaded without a sample spec of their own, so they follow the server's
+    loads = [c.args[0] for c in run_mock.call_args_list if c.args[0][1] == "load-module"]
+    assert len(loads) == 2
+    assert not [arg for cmd in loads for arg in cmd if arg.startswith(("format=", "rate=", "channels="))]
+
+
+def test_config_helpers(isolated_device_manager: PulseAudioDeviceManager) -> None:
+    device_manager = isolated_device_manager
+    for name in ("alphabet", "alpha"):
+        device_manager._write_pipe_to_config(
+            name,
+            PipeType.INPUT,
+            f"{name}-pipe",
+            name,
+            f"{name}-pipe.monitor",
+            f"{name}-OutputPipe",
+            f"{name}-InputPipe",
+        )
+    device_manager._write_pipe_to_config(
+        "beta", PipeType.OUTPUT, "beta", "beta-pipe", "beta.monitor", "beta-OutputPipe", "beta-InputPipe"
+    )
+    assert ".include soundpasta.pa" in device_manager._default_config_file.read_text()
+    assert device_manager._load_config_pipe_names() == {"alphabet", "alpha", "beta"}
+    assert device_manager._config_contains("sink_name=alpha-pipe", "source_name=beta-pipe")
+    assert not device_manager._config_lacks_final_newline()
+    # Names are matched exactly, so removing "alpha" keeps "alphabet"
+    device_manager._remove_pipe_from_config("alpha", PipeType.INPUT)
+    assert device_manager._load_config_pipe_names() == {"alphabet", "beta"}
+    assert not device_manager._config_contains("sink_name=alpha-pipe")
+    assert device_manager._config_contains("sink_name=alphabet-pipe", "source_name=alphabet")
+
+
 @pytest.mark.gui
 def test_list_inputs(device_manager: PulseAudioDeviceManager) -> None:
     devices = device_manager.list_inputs()
@@ -315,173 +547,151 @@ def test_list_outputs(device_manager: PulseAudioDeviceManager) -> None:
 
 
 @pytest.mark.gui
-def test_play(device_manager: PulseAudioDeviceManager) -> None:
+def test_play(device_manager: PulseAudioDeviceManager, sine_wav_factory: typing.Callable[..., str]) -> None:
     outputs = device_manager.list_outputs()
     assert len(outputs) > 0
     output_device = outputs[0]
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
-        generated_path = tmp_file.name
-    try:
-        generate_sine_wave_wav(generated_path, frequency=18000, duration=2.0)
-        with open(generated_path, "rb") as audio_file:
-            audio_data = io.BytesIO(audio_file.read())
-        audio_data.seek(0)
-        device_manager.play(output_device, audio_data, raw=False)
-    finally:
-        cleanup_temp_files(generated_path)
+    generated_path = sine_wav_factory(18000, 2.0)
+    with open(generated_path, "rb") as audio_file:
+        audio_data = io.BytesIO(audio_file.read())
+    audio_data.seek(0)
+    device_manager.play(output_device, audio_data, raw=False)
 
 
 @pytest.mark.gui
-def test_record(device_manager: PulseAudioDeviceManager) -> None:
+def test_record(device_manager: PulseAudioDeviceManager, tmp_dir: Path, request: pytest.FixtureRequest) -> None:
     inputs = device_manager.list_inputs()
     assert len(inputs) > 0
     input_device = inputs[0]
     duration = 0.5
     audio_data = io.BytesIO()
     device_manager.record(input_device, audio_data, duration, raw=False)
-    audio_data.seek(0)
-    recorded_bytes = audio_data.read()
-    assert len(recorded_bytes) > 0
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
-        recorded_path = tmp_file.name
-    try:
-        save_bytesio_to_file(audio_data, recorded_path)
-        data, sample_rate = soundfile.read(recorded_path)
-        assert len(data) >= 0
-        assert sample_rate > 0
-        if len(data) > 0:
-            max_amplitude = numpy.max(numpy.abs(data))
-            assert max_amplitude >= 0
-            assert max_amplitude <= 1.0
-    finally:
-        cleanup_temp_files(recorded_path)
+    assert audio_data.getbuffer().nbytes > 0
+    recorded_path = str(tmp_dir / f"recorded_{request.node.name}.wav")
+    save_bytesio_to_file(audio_data, recorded_path)
+    data, sample_rate = soundfile.read(recorded_path)
+    assert len(data) >= 0
+    assert sample_rate > 0
+    if len(data) > 0:
+        max_amplitude = numpy.max(numpy.abs(data))
+        assert max_amplitude >= 0
+        assert max_amplitude <= 1.0
 
 
 @pytest.mark.gui
-def test_dtmf_detection() -> None:
+def test_dtmf_detection(dtmf_wav_factory: typing.Callable[..., str], tmp_dir: Path) -> None:
     test_digits = "147"
     tone_duration = 0.3
-    with tempfile.TemporaryDirectory() as tmpdir:
-        for digit in test_digits:
-            wav_path = os.path.join(tmpdir, f"digit_{digit}.wav")
-            generate_dtmf_tone_wav(wav_path, digit, tone_duration)
-            mono_path = os.path.join(tmpdir, f"digit_{digit}_mono.wav")
+    for digit in test_digits:
+        wav_path = dtmf_wav_factory(digit, tone_duration, 0.5)
+        detected_digit = detect_dtmf_digits(wav_path)
+        if detected_digit != digit:
+            # This dtmf2num build misreads the file as is, so resample it to what it always accepts
+            mono_path = str(tmp_dir / f"digit_{digit}_mono.wav")
             convert_wav_to_mono_8khz(wav_path, mono_path)
             detected_digit = detect_dtmf_digits(mono_path)
-            assert detected_digit == digit, f"Expected {digit}, got {detected_digit}"
+        assert detected_digit == digit, f"Expected {digit}, got {detected_digit}"
 
 
 @pytest.mark.gui
-def test_sine_wave_pipe(device_manager: PulseAudioDeviceManager, virtual_sink: str) -> None:
+async def test_sine_wave_pipe(
+    device_manager: PulseAudioDeviceManager,
+    virtual_sink: str,
+    sine_wav_factory: typing.Callable[..., str],
+    tmp_dir: Path,
+    request: pytest.FixtureRequest,
+) -> None:
     sample_rate = 44100
     frequency = 18000
     duration = 1.0
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as generated_file:
-        generated_path = generated_file.name
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as recorded_file:
-        recorded_path = recorded_file.name
-    try:
-        generate_sine_wave_wav(generated_path, frequency, duration, sample_rate)
-        pipe = get_or_create_pipe(device_manager, virtual_sink, PipeType.INPUT)
-        virtual_sink_device = pipe.sink
-        monitor_source = pipe.monitor
-        record_duration = duration + 2.0
-        recorded_data = record_and_play_through_pipe(
-            device_manager,
-            virtual_sink_device,
-            monitor_source,
-            generated_path,
-            record_duration,
-            pre_play_delay=1.0,
-            post_play_delay=1.0,
-        )
-        recorded_data.seek(0)
-        assert len(recorded_data.read()) > 0, "Recorded audio is empty"
-        save_bytesio_to_file(recorded_data, recorded_path)
-        data, sr = soundfile.read(recorded_path)
-        assert len(data) > 0, "Recorded data is empty"
-        assert sr == sample_rate, f"Expected sample rate {sample_rate}, got {sr}"
-        if len(data.shape) > 1:
-            data = data[:, 0]
-        max_amplitude = numpy.max(numpy.abs(data))
-        assert max_amplitude > 0.01, f"Recorded signal too quiet: max amplitude {max_amplitude}"
-        fft = numpy.fft.fft(data)
-        freqs = numpy.fft.fftfreq(len(data), 1 / sr)
-        magnitude = numpy.abs(fft)
-        peak_freq_idx = numpy.argmax(magnitude[: len(magnitude) // 2])
-        peak_freq = abs(freqs[peak_freq_idx])
-        assert abs(peak_freq - frequency) < 500, f"Expected frequency around {frequency}Hz, got {peak_freq}Hz"
-    finally:
-        cleanup_temp_files(generated_path, recorded_path)
+    generated_path = sine_wav_factory(frequency, duration, sample_rate)
+    recorded_path = str(tmp_dir / f"recorded_{request.node.name}.wav")
+    pipe = get_or_create_pipe(device_manager, virtual_sink, PipeType.INPUT)
+    virtual_sink_device = pipe.sink
+    monitor_source = pipe.monitor
+    record_duration = duration + 5.0
+    recorded_data = await record_and_play_through_pipe(
+        device_manager,
+        virtual_sink_device,
+        monitor_source,
+        generated_path,
+        record_duration,
+    )
+    assert recorded_data.getbuffer().nbytes > 0, "Recorded audio is empty"
+    save_bytesio_to_file(recorded_data, recorded_path)
+    data, sr = soundfile.read(recorded_path)
+    assert len(data) > 0, "Recorded data is empty"
+    assert sr == sample_rate, f"Expected sample rate {sample_rate}, got {sr}"
+    if len(data.shape) > 1:
+        data = data[:, 0]
+    max_amplitude = numpy.max(numpy.abs(data))
+    assert max_amplitude > 0.01, f"Recorded signal too quiet: max amplitude {max_amplitude}"
+    n = len(data)
+    target_bin = round(n * frequency / sr)
+    # The tone only lasts part of the recording, which spreads it over about n / (duration * sr) bins
+    # either side of its own; sum two lobes' worth to cover that leakage
+    spread = math.ceil(2 * n / (duration * sr))
+    samples = data.tolist()
+    power = sum(goertzel_power(samples, k) for k in range(target_bin - spread, target_bin + spread + 1))
+    # By Parseval all N bins sum to N * sum(x**2), and a real tone's power is split between bins +k and -k
+    total_power = n * float(numpy.dot(data, data))
+    share = 2 * power / total_power
+    assert share > 0.8, f"Expected most of the recorded power near {frequency}Hz, got {share:.0%}"
 
 
 @pytest.mark.gui
-def test_dtmf_single_digit_pipe(device_manager: PulseAudioDeviceManager, virtual_sink: str) -> None:
+async def test_dtmf_single_digit_pipe(
+    device_manager: PulseAudioDeviceManager, virtual_sink: str, dtmf_wav_factory: typing.Callable[..., str]
+) -> None:
     test_digit = "1"
     tone_duration = 0.3
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as generated_file:
-        generated_path = generated_file.name
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as recorded_file:
-        recorded_path = recorded_file.name
+    generated_path = dtmf_wav_factory(test_digit, tone_duration, 0.5)
+    pipe = get_or_create_pipe(device_manager, virtual_sink, PipeType.INPUT)
+    virtual_sink_device = pipe.sink
+    monitor_source = pipe.monitor
+    record_duration = tone_duration + 5.0
+    sox, dtmf = start_dtmf_detection(*RAW_SOX_INPUT)
+    assert sox.stdin is not None
     try:
-        generate_dtmf_tone_wav(generated_path, test_digit, tone_duration)
-        pipe = get_or_create_pipe(device_manager, virtual_sink, PipeType.INPUT)
-        virtual_sink_device = pipe.sink
-        monitor_source = pipe.monitor
-        record_duration = tone_duration + 3.5
-        recorded_data = record_and_play_through_pipe(
+        recorded_data = await record_and_play_through_pipe(
             device_manager,
             virtual_sink_device,
             monitor_source,
             generated_path,
             record_duration,
-            pre_play_delay=1.2,
-            post_play_delay=2.0,
+            sink=sox.stdin,
         )
-        recorded_data.seek(0)
-        assert len(recorded_data.read()) > 0, "Recorded audio is empty"
-        save_bytesio_to_file(recorded_data, recorded_path)
-        mono_recorded_path = f"{recorded_path}.mono.wav"
-        convert_wav_to_mono_8khz(recorded_path, mono_recorded_path)
-        detected_digit = detect_dtmf_digits(mono_recorded_path)
-        assert detected_digit == test_digit, f"Expected {test_digit}, got {detected_digit}"
-        cleanup_temp_files(mono_recorded_path)
     finally:
-        cleanup_temp_files(generated_path, recorded_path)
+        detected_digit = finish_dtmf_detection(sox, dtmf)
+    assert recorded_data.written > 0, "Recorded audio is empty"
+    assert detected_digit == test_digit, f"Expected {test_digit}, got {detected_digit}"
 
 
 @pytest.mark.gui
-def test_dtmf_pipe(device_manager: PulseAudioDeviceManager, virtual_sink: str) -> None:
+async def test_dtmf_pipe(
+    device_manager: PulseAudioDeviceManager, virtual_sink: str, dtmf_wav_factory: typing.Callable[..., str]
+) -> None:
     test_digits = "147"
     tone_duration = 0.3
     pause_duration = 0.5
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as generated_file:
-        generated_path = generated_file.name
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as recorded_file:
-        recorded_path = recorded_file.name
+    generated_path = dtmf_wav_factory(test_digits, tone_duration, pause_duration)
+    pipe = get_or_create_pipe(device_manager, virtual_sink, PipeType.INPUT)
+    virtual_sink_device = pipe.sink
+    monitor_source = pipe.monitor
+    audio_duration = len(test_digits) * (tone_duration + pause_duration) - pause_duration
+    record_duration = audio_duration + 5.0
+    sox, dtmf = start_dtmf_detection(*RAW_SOX_INPUT)
+    assert sox.stdin is not None
     try:
-        generate_dtmf_sequence_wav(generated_path, test_digits, tone_duration, pause_duration)
-        pipe = get_or_create_pipe(device_manager, virtual_sink, PipeType.INPUT)
-        virtual_sink_device = pipe.sink
-        monitor_source = pipe.monitor
-        audio_duration = len(test_digits) * (tone_duration + pause_duration) - pause_duration
-        record_duration = audio_duration + 3.5
-        recorded_data = record_and_play_through_pipe(
+        recorded_data = await record_and_play_through_pipe(
             device_manager,
             virtual_sink_device,
             monitor_source,
             generated_path,
             record_duration,
-            pre_play_delay=1.2,
-            post_play_delay=2.0,
+            sink=sox.stdin,
         )
-        recorded_data.seek(0)
-        assert len(recorded_data.read()) > 0, "Recorded audio is empty"
-        save_bytesio_to_file(recorded_data, recorded_path)
-        mono_recorded_path = f"{recorded_path}.mono.wav"
-        convert_wav_to_mono_8khz(recorded_path, mono_recorded_path)
-        detected_digits = detect_dtmf_digits(mono_recorded_path)
-        assert detected_digits == test_digits, f"Expected {test_digits}, got {detected_digits}"
-        cleanup_temp_files(mono_recorded_path)
     finally:
-        cleanup_temp_files(generated_path, recorded_path)
+        detected_digits = finish_dtmf_detection(sox, dtmf)
+    assert recorded_data.written > 0, "Recorded audio is empty"
+    assert detected_digits == test_digits, f"Expected {test_digits}, got {detected_digits}"